@@ -0,0 +1,959 @@
+"""
+Camera pipeline for the Raspberry Pi Global Shutter Camera viewer.
+
+CameraApp opens the camera with Picamera2, shows a live preview and saves
+frames on request. main.py is its command line front end.
+"""
+
+import io
+import json
+import mmap
+import sys
+import os
+import time
+import queue
+import subprocess
+import threading
+from contextlib import contextmanager
+import cv2
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Picamera2 names pixel formats after libcamera's little-endian convention, so
+# "RGB888" arrives as [B, G, R] bytes - already OpenCV's channel order. These
+# slices turn each format into a BGR view of the frame without copying it.
+BGR_CHANNELS = {
+    "RGB888": slice(None),
+    "XRGB8888": slice(0, 3),
+    "BGR888": slice(None, None, -1),
+    "XBGR8888": slice(2, None, -1),
+}
+
+# Installed package database, and where the dependency report is cached
+DPKG_STATUS = "/var/lib/dpkg/status"
+DIAGNOSTICS_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "camera_set_up", "diag.json")
+
+# O_DIRECT writes must cover whole blocks from block-aligned memory; a page
+# satisfies the block size of SD cards and NVMe drives alike
+DIRECT_IO_ALIGNMENT = mmap.PAGESIZE
+
+# CPU cores for each thread on boards with at least four, like the Pi 4 and 5.
+# Keeping threads on their own cores stops the frame buffers they work on
+# from moving between the cores' caches.
+CAPTURE_CPUS = {0}
+DISPLAY_CPUS = {1}
+SAVER_CPUS = {2, 3}
+
+# The OpenCV window is painted at most this often; faster than the eye can
+# follow is wasted work. Capture and saving still run at the camera's rate.
+DISPLAY_FPS = 30
+
+# Quality of JPEG files encoded with OpenCV, unless one is chosen
+JPEG_QUALITY = 85
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+    def _rgb_to_bgr(src, dst):
+        """Write the red-first (optionally padded) pixels of src into dst as BGR."""
+        height, width = dst.shape[0], dst.shape[1]
+        for y in numba.prange(height):
+            for x in range(width):
+                dst[y, x, 0] = src[y, x, 2]
+                dst[y, x, 1] = src[y, x, 1]
+                dst[y, x, 2] = src[y, x, 0]
+else:
+    _rgb_to_bgr = None
+
+def can_pin_threads():
+    """
+    Return whether threads are pinned to cores: the platform must support
+    per-thread affinity and have enough cores for the threads to be split up.
+    """
+    return hasattr(os, "sched_setaffinity") and (os.cpu_count() or 1) >= 4
+
+def jpeg_params(quality=JPEG_QUALITY):
+    """
+    Return the cv2.imwrite parameters for saved JPEG files, so that frames
+    converted from a raw file match frames saved as JPEG files directly.
+    """
+    # Favour encode speed: no Huffman optimisation or progressive pass,
+    # and 4:2:0 chroma subsampling
+    params = [
+        cv2.IMWRITE_JPEG_QUALITY, quality,
+        cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+        cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+    ]
+    # The sampling factor can only be set from OpenCV 4.7; older versions
+    # use libjpeg's default, which is 4:2:0 anyway
+    if hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+        params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+    return params
+
+def pin_current_thread(cpus):
+    """Pin the calling thread to the given CPU cores, where can_pin_threads() allows."""
+    if not can_pin_threads():
+        return
+    try:
+        os.sched_setaffinity(threading.get_native_id(), cpus)
+    except OSError as e:
+        print(f"Could not pin {threading.current_thread().name} thread to CPUs {sorted(cpus)}: {e}")
+
+class BgrConverter:
+    """
+    Presents frames in the camera's pixel format as BGR images for OpenCV.
+
+    Formats already in OpenCV's order are returned as zero-copy views. For
+    red-first formats a reversed view would make OpenCV copy it with a slow
+    strided loop, so when Numba is installed the channels are swapped by a
+    parallel kernel into a preallocated buffer instead.
+    """
+
+    def __init__(self, pixel_format, sample_frame):
+        self._channels = BGR_CHANNELS[pixel_format]
+        self._swap = self._channels.step == -1 and _rgb_to_bgr is not None
+        self._buffer = None
+        if self._swap:
+            self._buffer = np.empty(sample_frame.shape[:2] + (3,), dtype=np.uint8)
+            # Compile the kernel now rather than on the first displayed frame
+            _rgb_to_bgr(sample_frame, self._buffer)
+
+    def view(self, frame):
+        """Return frame as BGR. The result is only valid until the next call."""
+        if self._swap:
+            _rgb_to_bgr(frame, self._buffer)
+            return self._buffer
+        return frame[:, :, self._channels]
+
+    def copy(self, frame):
+        """Return frame as a BGR array owned by the caller."""
+        if self._swap:
+            image = np.empty_like(self._buffer)
+            _rgb_to_bgr(frame, image)
+            return image
+        return frame[:, :, self._channels].copy()
+
+class FrameHandoff:
+    """
+    Double-buffered handoff of the newest frames from the capture thread.
+
+    Each buffer holds one array per camera stream, keyed by stream name. The
+    capture thread fills the back buffer and then swaps it with the front
+    buffer. Readers hold the lock only while they use the front buffer, so the
+    capture thread is never blocked while it waits on the camera.
+    """
+
+    def __init__(self, first_frames):
+        self._front = {name: frame.copy() for name, frame in first_frames.items()}
+        self._back = {name: np.empty_like(frame) for name, frame in first_frames.items()}
+        self._lock = threading.Lock()
+        self.frame_ready = threading.Event()
+        self.frame_ready.set()
+
+    @property
+    def back(self):
+        """Buffers owned by the capture thread for the next frames."""
+        return self._back
+
+    def publish(self):
+        """Make the back buffer the latest frame and signal waiting readers."""
+        with self._lock:
+            self._front, self._back = self._back, self._front
+        self.frame_ready.set()
+
+    @contextmanager
+    def latest(self):
+        """Borrow the latest frames; they must not be used after the block ends."""
+        with self._lock:
+            yield self._front
+
+class FrameSaver:
+    """
+    Encodes and writes captured frames on a pool of background threads.
+
+    OpenCV releases the GIL while encoding, so a burst of captures is spread
+    across the CPU cores: by default one thread per core in SAVER_CPUS when
+    threads are pinned, otherwise one per core. The queue is bounded so that
+    a long burst holds up the caller instead of using unbounded memory.
+    """
+
+    def __init__(self, quality=JPEG_QUALITY, workers=None, max_queued=32):
+        self.saved = 0
+        self._jpeg_params = jpeg_params(quality)
+        self._saved_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"frame-saver-{i}", daemon=True)
+            for i in range(workers or self._default_workers())
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def save(self, frame, filepath):
+        """
+        Queue a frame for writing. The frame is either an image array, which
+        the saver takes ownership of, or the bytes of an already encoded JPEG.
+        """
+        self._queue.put((frame, filepath))
+
+    def close(self):
+        """Write any queued frames and stop the saver threads."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    @staticmethod
+    def _default_workers():
+        # More threads than pinned cores would only take turns on them
+        if can_pin_threads():
+            return len(SAVER_CPUS)
+        return os.cpu_count() or 1
+
+    def _run(self):
+        pin_current_thread(SAVER_CPUS)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, filepath = item
+            # A failed frame must not end the thread, or save() would
+            # eventually block forever on a full queue
+            try:
+                success = self._write(frame, filepath)
+            except Exception as e:
+                print(f"Error: Failed to save frame to {filepath}: {e}")
+                continue
+            if success:
+                with self._saved_lock:
+                    self.saved += 1
+                print(f"Frame captured: {os.path.basename(filepath)}")
+            else:
+                print(f"Error: Failed to save frame to {filepath}")
+
+    def _write(self, frame, filepath):
+        if isinstance(frame, bytes):
+            with open(filepath, "wb") as f:
+                f.write(frame)
+            return True
+        return cv2.imwrite(filepath, frame, self._jpeg_params)
+
+class RawFrameWriter:
+    """
+    Appends captured frames, uncompressed, to a single raw file on a
+    background thread.
+
+    Each frame is one fixed-size record written without encoding, so a burst
+    costs only the copy to disk and pixels are kept exactly. A JSON sidecar,
+    written when the first frame arrives, records the frame layout; the name
+    and time of each record are appended as one JSON line to a separate index
+    file. Each frame therefore costs the same small amount of bookkeeping, and
+    the frames already on disk can still be converted if the program does not
+    exit cleanly.
+
+    With direct=True the file is opened with O_DIRECT, so sustained bursts do
+    not fill the page cache with frames that will not be read back. Records
+    are then padded to whole blocks and written from a page-aligned buffer.
+    """
+
+    def __init__(self, basepath, direct=False, max_queued=32):
+        self.saved = 0
+        self.raw_path = basepath + ".raw"
+        self.meta_path = basepath + ".json"
+        self.index_path = basepath + ".frames.jsonl"
+        self._direct = direct
+        self._staging = None
+        self._staging_frame = None
+        self._file = None
+        self._index = None
+        self._record_size = None
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._run, name="raw-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, frame, filepath):
+        """
+        Queue a BGR image array for writing; the writer takes ownership of it.
+        The file name is recorded so the frame converts to the same JPEG name.
+        """
+        self._queue.put((frame, os.path.basename(filepath), time.time()))
+
+    def close(self):
+        """Write any queued frames, then close the raw file."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._index is not None:
+            self._index.close()
+        if self._file is not None:
+            self._file.close()
+            print(f"Raw frames written to {self.raw_path}")
+
+    def _run(self):
+        pin_current_thread(SAVER_CPUS)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, name, timestamp = item
+            # Any failure skips just this frame; if the thread ended, save()
+            # would eventually block forever on a full queue
+            try:
+                if self._file is None:
+                    self._open(frame)
+                self._write(frame)
+                # One write per line, so a crash leaves at most a partial
+                # last line, which the converter ignores
+                line = json.dumps({"name": name, "time": timestamp}) + "\n"
+                self._index.write(line.encode())
+            except Exception as e:
+                print(f"Error: Failed to save frame {name} to {self.raw_path}: {e}")
+                self._discard_partial_record()
+                continue
+            self.saved += 1
+            print(f"Frame captured: {name}")
+
+    def _open(self, frame):
+        record_size = frame.nbytes
+        if self._direct:
+            try:
+                fd = os.open(self.raw_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+            except (AttributeError, OSError) as e:
+                print(f"Direct I/O not available ({e}), writing through the page cache")
+                self._direct = False
+        if self._direct:
+            record_size = -(-frame.nbytes // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+            # Anonymous mappings are page-aligned, and the padding stays zero
+            self._staging = mmap.mmap(-1, record_size)
+            self._staging_frame = np.frombuffer(self._staging, dtype=frame.dtype,
+                                                count=frame.size).reshape(frame.shape)
+            self._file = open(fd, "wb", buffering=0)
+        else:
+            self._file = open(self.raw_path, "wb", buffering=0)
+        self._record_size = record_size
+        self._index = open(self.index_path, "wb", buffering=0)
+        meta = {
+            "raw_file": os.path.basename(self.raw_path),
+            "frames_file": os.path.basename(self.index_path),
+            "width": frame.shape[1],
+            "height": frame.shape[0],
+            "channels": frame.shape[2],
+            "dtype": str(frame.dtype),
+            "record_size": record_size,
+        }
+        with open(self.meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def _write(self, frame):
+        # Write straight from the array's memory, or from the aligned staging
+        # buffer for direct I/O; an unbuffered file may accept less than the
+        # whole record in one call
+        if self._direct:
+            np.copyto(self._staging_frame, frame)
+            view = memoryview(self._staging)
+        else:
+            view = memoryview(frame).cast("B")
+        while view:
+            view = view[self._file.write(view):]
+
+    def _discard_partial_record(self):
+        # Keep the raw file in step with the index, so that a failed write
+        # does not shift every later record
+        if self._file is None:
+            return
+        try:
+            end = self.saved * self._record_size
+            self._file.truncate(end)
+            self._file.seek(end)
+        except OSError:
+            pass
+
+class LatestJpeg(io.BufferedIOBase):
+    """
+    File-like sink for Picamera2's MJPEG encoder that keeps only the most
+    recent frame. Each write from the encoder is one complete JPEG image.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._frame = None
+        self._lock = threading.Lock()
+        self._first_frame = threading.Event()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        frame = bytes(data)
+        with self._lock:
+            self._frame = frame
+        self._first_frame.set()
+        return len(frame)
+
+    def latest(self, timeout=None):
+        """
+        Return the most recent JPEG, waiting up to timeout seconds for the
+        first one. Returns None if nothing has been encoded by then.
+        """
+        self._first_frame.wait(timeout)
+        with self._lock:
+            return self._frame
+
+class FrameNamer:
+    """
+    Builds timestamped, numbered paths for captured frames. The timestamp only
+    changes once a second, so it is formatted once per second, not per frame.
+    """
+
+    def __init__(self, frames_dir):
+        self._prefix = frames_dir + os.sep + "frame_"
+        self._count = 0
+        self._second = None
+        self._timestamp = ""
+
+    def next_path(self):
+        """Return the path for the next captured frame."""
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(second))
+        path = f"{self._prefix}{self._timestamp}_{self._count}.jpg"
+        self._count += 1
+        return path
+
+class StillCapture:
+    """
+    Full-resolution captures taken while the camera streams at preview
+    resolution. The capture thread owns the camera, so it switches into the
+    still mode between preview frames; stills are then saved like any frame.
+
+    Each mode switch holds up the stream for a few frames, so at most one
+    request waits while a still is taken; a held key does not queue more.
+    """
+
+    def __init__(self, picam2, config, saver):
+        self._picam2 = picam2
+        self._config = config
+        self._saver = saver
+        self._pending = queue.Queue(maxsize=1)
+
+    def request(self, filepath):
+        """Ask for a still to be captured and saved to filepath."""
+        try:
+            self._pending.put_nowait(filepath)
+        except queue.Full:
+            print(f"Still capture already pending, {os.path.basename(filepath)} skipped")
+
+    def capture_pending(self, stop_event):
+        """
+        Capture any requested stills until stop_event is set. Called on the
+        capture thread.
+        """
+        while not stop_event.is_set():
+            try:
+                filepath = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                image = self._picam2.switch_mode_and_capture_array(self._config, "main")
+            except Exception as e:
+                print(f"Error: Failed to capture still for {filepath}: {e}")
+                continue
+            self._saver.save(image, filepath)
+
+def capture_frames(picam2, handoff, stop_event, stills=None):
+    """Capture the handoff's streams into it until stop_event is set."""
+    from picamera2 import MappedArray
+    
+    pin_current_thread(CAPTURE_CPUS)
+    try:
+        while not stop_event.is_set():
+            if stills:
+                stills.capture_pending(stop_event)
+            request = picam2.capture_request()
+            try:
+                # Copy straight from the camera's buffers into the preallocated
+                # back buffers, rather than allocating a new array every frame
+                for name, buffer in handoff.back.items():
+                    with MappedArray(request, name) as mapped:
+                        np.copyto(buffer, mapped.array)
+            finally:
+                request.release()
+            handoff.publish()
+    except Exception as e:
+        print(f"Camera error in capture thread: {e}")
+        stop_event.set()
+
+def display_image(frames, to_bgr, lores_width, use_opencl=False):
+    """
+    Return the BGR image to show for a set of captured frames. The image does
+    not share memory with the frames, so it can be shown after the handoff
+    lock is released.
+    """
+    if "lores" in frames:
+        # The ISP has already scaled the lores stream down for display. Its
+        # YUV420 rows are padded out to the stride, so crop after converting.
+        lores = frames["lores"]
+        if use_opencl:
+            # Upload once and keep the conversion and crop on the device
+            height = lores.shape[0] * 2 // 3
+            image = cv2.cvtColor(cv2.UMat(lores), cv2.COLOR_YUV2BGR_I420)
+            return cv2.UMat(image, (0, height), (0, lores_width))
+        return cv2.cvtColor(lores, cv2.COLOR_YUV2BGR_I420)[:, :lores_width]
+    # Without lores this is the small fallback stream; a view of it would
+    # alias the buffer the capture thread reuses, so take a copy
+    return to_bgr.copy(frames["main"])
+
+def save_latest_frame(handoff, to_bgr, hardware_jpeg, saver, filepath):
+    """
+    Hand the latest frame to the saver: the hardware encoded JPEG when the
+    hardware encoder is running, otherwise a copy of the image, as the capture
+    thread will reuse the buffer.
+    """
+    if hardware_jpeg:
+        # The main stream is not copied into the handoff in this case, so
+        # there is nothing to fall back on until the first JPEG arrives
+        jpeg = hardware_jpeg.latest(timeout=1.0)
+        if jpeg is None:
+            print(f"Error: No frame from the hardware JPEG encoder yet, {os.path.basename(filepath)} not saved")
+            return
+        saver.save(jpeg, filepath)
+    else:
+        with handoff.latest() as frames:
+            saver.save(to_bgr.copy(frames["main"]), filepath)
+
+def run_opencv_display(handoff, stop_event, to_bgr, lores_width, use_opencl, capture):
+    """Show frames in an OpenCV window until 'q' is pressed."""
+    interval = 1 / DISPLAY_FPS
+    next_paint = 0.0
+    while not stop_event.is_set():
+        # Each pass blocks for at most one display interval, either until the
+        # next paint is due or for a new frame, so keys are polled at least
+        # DISPLAY_FPS times a second even if the camera stalls
+        remaining = next_paint - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        elif handoff.frame_ready.wait(timeout=interval):
+            handoff.frame_ready.clear()
+            next_paint = time.monotonic() + interval
+            
+            # Convert under the lock, but paint after it is released so the
+            # capture thread never waits on the GUI
+            with handoff.latest() as frames:
+                image = display_image(frames, to_bgr, lores_width, use_opencl)
+            cv2.imshow("Raspberry Pi Camera", image)
+        
+        # Handle keyboard input without sleeping in the GUI layer
+        key = cv2.pollKey() & 0xFF
+        
+        if key == ord('q'):
+            print("Exiting...")
+            break
+        elif key == ord(' '):  # spacebar
+            capture()
+
+def run_terminal_keys(stop_event, capture):
+    """
+    Read single key presses from the terminal until 'q' is pressed. Used with
+    Picamera2's own previews, which run on their own thread and do not pass
+    keyboard input back.
+    """
+    import select
+    import termios
+    import tty
+    
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        while not stop_event.is_set():
+            ready, _, _ = select.select([sys.stdin], [], [], 0.1)
+            if not ready:
+                continue
+            key = sys.stdin.read(1)
+            if key == 'q':
+                print("Exiting...")
+                break
+            elif key == ' ':  # spacebar
+                capture()
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+def start_hardware_jpeg(picam2):
+    """
+    Start the VideoCore hardware JPEG encoder on the main stream so that
+    saving a frame costs no CPU time. Returns the LatestJpeg sink, or None if
+    the hardware encoder is not available (e.g. on a Raspberry Pi 5).
+    """
+    try:
+        from picamera2.encoders import MJPEGEncoder, Quality
+        from picamera2.outputs import FileOutput
+        
+        latest_jpeg = LatestJpeg()
+        picam2.start_encoder(MJPEGEncoder(), FileOutput(latest_jpeg), quality=Quality.VERY_HIGH)
+        print("Using hardware JPEG encoder for saved frames")
+        return latest_jpeg
+    except Exception as e:
+        print(f"Hardware JPEG encoder not available ({e}), saving with OpenCV")
+        return None
+
+def run_dependency_checks():
+    """Run the package checks and return the report lines."""
+    report = []
+    
+    # Check if picamera2 is installed in system packages
+    try:
+        result = subprocess.run(["apt", "list", "--installed", "python3-picamera2"], 
+                               capture_output=True, text=True, check=False)
+        if "python3-picamera2" in result.stdout and "installed" in result.stdout:
+            report.append("✓ python3-picamera2 is installed via apt")
+        else:
+            report.append("✗ python3-picamera2 is NOT installed via system packages")
+            report.append("  Try: sudo apt install python3-picamera2")
+    except Exception as e:
+        report.append(f"? Error checking apt packages: {e}")
+    
+    # Check for libcamera
+    try:
+        result = subprocess.run(["apt", "list", "--installed", "libcamera*"], 
+                               capture_output=True, text=True, check=False)
+        if "libcamera" in result.stdout and "installed" in result.stdout:
+            report.append("✓ libcamera packages are installed")
+        else:
+            report.append("✗ libcamera packages might be missing")
+            report.append("  Try: sudo apt install libcamera-apps")
+    except Exception as e:
+        report.append(f"? Error checking libcamera: {e}")
+    
+    # Check camera tools
+    try:
+        result = subprocess.run(["which", "libcamera-hello"], 
+                               capture_output=True, text=True, check=False)
+        if result.returncode == 0:
+            report.append("✓ libcamera tools are installed")
+        else:
+            report.append("✗ libcamera-hello command not found")
+            report.append("  Try: sudo apt install libcamera-apps")
+    except Exception as e:
+        report.append(f"? Error checking camera tools: {e}")
+    
+    return report
+
+def dependency_report():
+    """
+    Return the dependency check report. The checks shell out to apt, which
+    takes seconds, so the report is cached until the set of installed
+    packages changes.
+    """
+    try:
+        packages_changed = os.stat(DPKG_STATUS).st_mtime
+    except OSError:
+        return run_dependency_checks()
+    
+    try:
+        with open(DIAGNOSTICS_CACHE) as f:
+            cached = json.load(f)
+        if cached["dpkg_mtime"] == packages_changed:
+            return cached["report"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    report = run_dependency_checks()
+    try:
+        os.makedirs(os.path.dirname(DIAGNOSTICS_CACHE), exist_ok=True)
+        with open(DIAGNOSTICS_CACHE, "w") as f:
+            json.dump({"dpkg_mtime": packages_changed, "report": report}, f)
+    except OSError:
+        pass
+    return report
+
+def check_dependencies():
+    """Check if the required dependencies are installed."""
+    print("\n----- CHECKING DEPENDENCIES -----")
+    for line in dependency_report():
+        print(line)
+    
+    print("---------------------------------")
+    print("\n----- TROUBLESHOOTING SUGGESTIONS -----")
+    print("1. Install picamera2 with system packages (preferred method):")
+    print("   sudo apt update")
+    print("   sudo apt install -y python3-picamera2 libcamera-apps")
+    print("\n2. Make sure the camera is enabled:")
+    print("   sudo raspi-config")
+    print("   (Navigate to Interface Options > Camera > Enable)")
+    print("\n3. Check if camera is detected:")
+    print("   vcgencmd get_camera")
+    print("   (Should show 'supported=1 detected=1')")
+    print("\n4. Test camera with system tools:")
+    print("   libcamera-hello --list-cameras")
+    print("   libcamera-jpeg -o test.jpg")
+    print("\n5. Ensure your user is in the 'video' group:")
+    print("   sudo usermod -aG video $USER")
+    print("   (Log out and back in for this to take effect)")
+    print("-----------------------------------------")
+
+class CameraApp:
+    """
+    Live camera viewer that saves frames on request.
+
+    size is the full capture resolution and display_size the resolution of
+    the stream used for display; save_format, jpeg_quality, preview, still,
+    burst, opencl and diagnose match the command line options of main.py.
+    """
+
+    def __init__(self, frames_dir, size=(1456, 1088), display_size=(912, 680),
+                 save_format="jpg", jpeg_quality=None, preview="opencv",
+                 still=False, burst=False, opencl=True, diagnose=False):
+        self.frames_dir = frames_dir
+        self.size = size
+        self.display_size = display_size
+        self.save_format = save_format
+        self.jpeg_quality = jpeg_quality
+        self.preview = preview
+        self.still = still
+        self.burst = burst
+        self.opencl = opencl
+        # OpenCL is only used by the OpenCV display
+        self._try_opencl = opencl and preview == "opencv"
+        self.diagnose = diagnose
+
+    def run(self):
+        """Open the camera and run the viewer until the user quits."""
+        # Every operation works on one whole frame, so OpenCV's thread pool
+        # mostly competes with the capture and saver threads for cores. Keep
+        # it to the calling thread: pool threads are created lazily and would
+        # inherit whichever core their creator was pinned to. Without the
+        # OpenCL display path, turn OpenCL off so it is never probed.
+        cv2.setUseOptimized(True)
+        cv2.setNumThreads(1)
+        if not self._try_opencl:
+            cv2.ocl.setUseOpenCL(False)
+        
+        # Picamera2's own previews take key presses from the terminal, which
+        # needs stdin to be one
+        if self.preview != "opencv" and not sys.stdin.isatty():
+            print(f"Error: --preview {self.preview} reads keys from the terminal, but stdin is not a terminal")
+            print("Run from a terminal, or use --preview opencv")
+            return
+        
+        # Check dependencies only when asked, as it is slow; failures below
+        # run the check themselves
+        if self.diagnose:
+            check_dependencies()
+        
+        # Create the frames directory if it doesn't exist
+        os.makedirs(self.frames_dir, exist_ok=True)
+        
+        # Import picamera2 here to handle import errors more gracefully
+        try:
+            from picamera2 import Picamera2, Preview
+            print("\n✓ Successfully imported picamera2")
+        except ImportError as e:
+            print(f"\n✗ Failed to import picamera2: {e}")
+            if not self.diagnose:
+                check_dependencies()
+            print("\nTo install picamera2 correctly, follow these steps:")
+            print("1. Exit any virtual environments")
+            print("2. Run: sudo apt install python3-picamera2")
+            print("3. Use the system Python instead of a virtual environment")
+            print("   or install picamera2 in your virtual environment with:")
+            print("   pip install picamera2")
+            return
+        except Exception as e:
+            print(f"\n✗ Unexpected error importing picamera2: {e}")
+            return
+        
+        # Initialize camera
+        print("\nInitializing Picamera2...")
+        picam2 = None
+        try:
+            picam2 = Picamera2()
+            
+            # List available cameras
+            cameras = picam2.global_camera_info()
+            if cameras:
+                print(f"Available cameras: {len(cameras)}")
+                for i, camera in enumerate(cameras):
+                    print(f"Camera {i}: {camera.get('Model', 'Unknown')} ({camera.get('Location', 'Unknown location')})")
+            else:
+                print("No cameras detected by Picamera2")
+                if not self.diagnose:
+                    check_dependencies()
+                return
+            
+            # Set up camera configuration
+            print("Setting up camera configuration...")
+            still_config = self._configure(picam2)
+            
+            # Work out how to view frames as BGR for OpenCV
+            camera_config = picam2.camera_configuration()
+            pixel_format = camera_config["main"]["format"]
+            if pixel_format not in BGR_CHANNELS:
+                print(f"Unsupported pixel format: {pixel_format}")
+                picam2.close()
+                return
+            print(f"Pixel format: {pixel_format}")
+            
+            # Picamera2's own previews draw the display stream straight to the
+            # screen, and must be set up before the camera starts
+            if self.preview != "opencv":
+                display_size = camera_config[camera_config.get("display") or "main"]["size"]
+                preview = Preview.QTGL if self.preview == "qt" else Preview.DRM
+                picam2.start_preview(preview, width=display_size[0], height=display_size[1])
+            
+            # Start the camera
+            print("Starting camera...")
+            picam2.start()
+            
+            self._stream(picam2, camera_config, pixel_format, still_config)
+        
+        except Exception as e:
+            print(f"Camera error: {e}")
+            if not self.diagnose:
+                check_dependencies()
+            print("\nAdditional troubleshooting:")
+            print("1. Make sure you're not running in a virtual environment")
+            print("2. Ensure the camera cable is properly connected")
+            print("3. Check if the camera is enabled in raspi-config")
+            print("4. Try rebooting your Raspberry Pi")
+            print("5. Run 'libcamera-hello' to test if the camera works with libcamera")
+            # Closing the camera also closes any preview it started
+            if picam2 is not None:
+                try:
+                    picam2.close()
+                except Exception:
+                    pass
+            cv2.destroyAllWindows()
+
+    def _configure(self, picam2):
+        """
+        Configure the camera streams, falling back to the default configuration
+        if the requested one fails. Returns the still configuration to switch to
+        for captures, or None if captures come from the stream.
+        """
+        width, height = self.size
+        display_width, display_height = self.display_size
+        try:
+            if self.still:
+                # Stream at display resolution only, and switch to the full
+                # resolution for each capture
+                config = picam2.create_preview_configuration(
+                    main={"size": self.display_size, "format": "RGB888"}
+                )
+                picam2.configure(config)
+                still_config = picam2.create_still_configuration(
+                    main={"size": self.size, "format": "RGB888"}
+                )
+                print(f"Using preview resolution: {display_width}x{display_height} (captures: {width}x{height})")
+                return still_config
+            
+            # Try to set the full resolution, in a format that OpenCV can use
+            # without converting, plus a smaller lores stream scaled by the ISP
+            # for the display
+            config = picam2.create_preview_configuration(
+                main={"size": self.size, "format": "RGB888"},
+                lores={"size": self.display_size, "format": "YUV420"},
+                display="lores"
+            )
+            picam2.configure(config)
+            print(f"Using full resolution: {width}x{height} (display: {display_width}x{display_height})")
+        except Exception as e:
+            print(f"Error setting full resolution: {e}")
+            print("Falling back to default configuration...")
+            config = picam2.create_preview_configuration()
+            picam2.configure(config)
+        return None
+
+    def _stream(self, picam2, camera_config, pixel_format, still_config):
+        """Capture, display and save frames from the started camera until the user quits."""
+        # Encode saved frames in hardware where possible; stills are not
+        # taken from the streaming main stream, so they cannot use it, and a
+        # chosen JPEG quality can only be honoured by OpenCV
+        hardware_jpeg = None
+        if self.save_format == "jpg" and still_config is None and self.jpeg_quality is None:
+            hardware_jpeg = start_hardware_jpeg(picam2)
+        
+        # Get camera info after starting
+        sensor_resolution = picam2.camera_properties.get('PixelArraySize', (0, 0))
+        print(f"Sensor resolution: {sensor_resolution[0]}x{sensor_resolution[1]}")
+        
+        # Get frame dimensions for each stream
+        streams = ["main", "lores"] if camera_config.get("lores") else ["main"]
+        lores_width = camera_config["lores"]["size"][0] if "lores" in streams else 0
+        request = picam2.capture_request()
+        try:
+            test_frames = {name: request.make_array(name) for name in streams}
+        finally:
+            request.release()
+        test_frame = test_frames["main"]
+        print(f"Captured frame size: {test_frame.shape[1]}x{test_frame.shape[0]}x{test_frame.shape[2]}")
+        to_bgr = BgrConverter(pixel_format, test_frame)
+        
+        # Run the display conversion through OpenCL when a device is available
+        use_opencl = self._try_opencl and cv2.ocl.haveOpenCL()
+        if self._try_opencl:
+            cv2.ocl.setUseOpenCL(use_opencl)
+        if use_opencl:
+            print(f"Using OpenCL device: {cv2.ocl.Device.getDefault().name()}")
+        
+        print("\nCamera started successfully!")
+        if self.preview != "opencv":
+            print("- Press keys in this terminal")
+        print("- Press SPACEBAR to capture a frame")
+        print("- Press 'q' to quit")
+        
+        # Capture runs on its own thread so that display and saving never
+        # hold up the camera; the latest frame is shared through the handoff.
+        # Only streams that something reads are copied: the OpenCV display
+        # reads lores when there is one (Picamera2's previews draw it
+        # themselves), and saves read main unless the hardware encoder
+        # supplies them.
+        handoff_streams = set()
+        if self.preview == "opencv":
+            handoff_streams.add("lores" if "lores" in streams else "main")
+        if hardware_jpeg is None:
+            handoff_streams.add("main")
+        handoff = FrameHandoff({name: test_frames[name] for name in handoff_streams})
+        
+        if self.save_format == "raw":
+            session = time.strftime("%Y%m%d_%H%M%S")
+            saver = RawFrameWriter(os.path.join(self.frames_dir, f"capture_{session}"),
+                                   direct=self.burst)
+        else:
+            saver = FrameSaver(quality=JPEG_QUALITY if self.jpeg_quality is None else self.jpeg_quality)
+        stills = StillCapture(picam2, still_config, saver) if still_config else None
+        
+        stop_event = threading.Event()
+        capture_thread = threading.Thread(target=capture_frames,
+                                          args=(picam2, handoff, stop_event, stills),
+                                          name="capture", daemon=True)
+        capture_thread.start()
+        
+        namer = FrameNamer(self.frames_dir)
+        
+        def capture():
+            if stills:
+                stills.request(namer.next_path())
+            else:
+                save_latest_frame(handoff, to_bgr, hardware_jpeg, saver, namer.next_path())
+        
+        pin_current_thread(DISPLAY_CPUS)
+        try:
+            if self.preview == "opencv":
+                run_opencv_display(handoff, stop_event, to_bgr, lores_width, use_opencl, capture)
+            else:
+                run_terminal_keys(stop_event, capture)
+        finally:
+            # Stop capturing and write out any frames still queued
+            stop_event.set()
+            capture_thread.join()
+            saver.close()
+        
+        # Clean up
+        if hardware_jpeg:
+            picam2.stop_encoder()
+        picam2.close()
+        cv2.destroyAllWindows()
+        print(f"Program ended. {saver.saved} frames captured.")
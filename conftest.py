@@ -0,0 +1,4 @@
+"""
+Makes the modules at the repository root importable from tests/ when the
+suite is run with a plain "pytest" as well as with "python -m pytest".
+"""
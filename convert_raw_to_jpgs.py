@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Convert a raw frame stream recorded with 'main.py --format raw' to JPEG files.
+
+Pass the JSON sidecar written next to the raw file, e.g.:
+    python convert_raw_to_jpgs.py frames/capture_YYYYMMDD_HHMMSS.json
+
+Frames are encoded in parallel, one process per CPU core, and are given the
+names and encoding settings they would have had if they had been saved as
+OpenCV-encoded JPEG files directly.
+"""
+
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+from camera import JPEG_QUALITY, jpeg_params
+
+# Per-process state, set up once by init_worker
+_frames = None
+_output_dir = None
+_jpeg_params = None
+
+def read_index(index_path):
+    """
+    Return the frame entries of a JSON Lines index, stopping at a partial last
+    line left by a capture that did not exit cleanly.
+    """
+    entries = []
+    with open(index_path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+    return entries
+
+def load_frames(meta_path):
+    """
+    Return the sidecar metadata, with its "frames" list filled in from the
+    index file, and a read-only memory map of the frames.
+    """
+    with open(meta_path) as f:
+        meta = json.load(f)
+    directory = os.path.dirname(meta_path)
+    raw_path = os.path.join(directory, meta["raw_file"])
+    dtype = np.dtype(meta["dtype"])
+    shape = (meta["height"], meta["width"], meta["channels"])
+    frame_size = int(np.prod(shape)) * dtype.itemsize
+    # Records written with direct I/O are padded out to whole blocks
+    record_size = meta.get("record_size", frame_size)
+    # Older sidecars list the frames themselves
+    if "frames_file" in meta:
+        meta["frames"] = read_index(os.path.join(directory, meta["frames_file"]))
+    # Only complete records count, in case the last one was cut short
+    count = min(len(meta["frames"]), os.path.getsize(raw_path) // record_size)
+    del meta["frames"][count:]
+    if count == 0:
+        return meta, np.empty((0,) + shape, dtype=dtype)
+    records = np.memmap(raw_path, dtype=np.uint8, mode="r",
+                        shape=(count, record_size))
+    frames = records[:, :frame_size].view(dtype).reshape((len(meta["frames"]),) + shape)
+    return meta, frames
+
+def init_worker(meta_path, output_dir, quality):
+    """Map the raw file once in each worker process."""
+    global _frames, _output_dir, _jpeg_params
+    _, _frames = load_frames(meta_path)
+    _output_dir = output_dir
+    _jpeg_params = jpeg_params(quality)
+
+def convert_frame(job):
+    """Encode one frame, returning its name and whether it was written."""
+    index, name = job
+    filepath = os.path.join(_output_dir, name)
+    return name, cv2.imwrite(filepath, np.asarray(_frames[index]), _jpeg_params)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a raw frame stream to JPEG files")
+    parser.add_argument("meta", help="JSON sidecar of the raw file")
+    parser.add_argument("--output", help="directory for the JPEG files "
+                                         "(default: the raw file's directory)")
+    parser.add_argument("--jpeg-quality", type=int, default=JPEG_QUALITY, metavar="Q",
+                        help=f"JPEG quality from 0 to 100 (default: {JPEG_QUALITY})")
+    args = parser.parse_args()
+    if not 0 <= args.jpeg_quality <= 100:
+        parser.error("--jpeg-quality must be between 0 and 100")
+
+    try:
+        meta, _ = load_frames(args.meta)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: Failed to read {args.meta}: {e}")
+        return 1
+
+    output_dir = args.output or os.path.dirname(os.path.abspath(args.meta))
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = [(i, frame["name"]) for i, frame in enumerate(meta["frames"])]
+    print(f"Converting {len(jobs)} frames to {output_dir}...")
+
+    failed = 0
+    with Pool(initializer=init_worker, initargs=(args.meta, output_dir, args.jpeg_quality)) as pool:
+        for name, success in pool.imap_unordered(convert_frame, jobs):
+            if success:
+                print(f"Frame converted: {name}")
+            else:
+                failed += 1
+                print(f"Error: Failed to save frame {name}")
+
+    print(f"Done. {len(jobs) - failed} frames converted.")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
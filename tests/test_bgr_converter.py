@@ -0,0 +1,46 @@
+"""BgrConverter against frames packed by hand in each Picamera2 pixel format."""
+
+import numpy as np
+import pytest
+
+import camera
+
+# Byte order of each format in memory, written out independently of
+# BGR_CHANNELS; "x" is the padding byte of the 32-bit formats
+LAYOUTS = {
+    "RGB888": "bgr",
+    "XRGB8888": "bgrx",
+    "BGR888": "rgb",
+    "XBGR8888": "rgbx",
+}
+
+def pack(bgr, layout):
+    """Return the BGR image packed into a frame with the given byte order."""
+    planes = {"b": bgr[:, :, 0], "g": bgr[:, :, 1], "r": bgr[:, :, 2],
+              "x": np.full(bgr.shape[:2], 255, dtype=np.uint8)}
+    return np.ascontiguousarray(np.stack([planes[c] for c in layout], axis=2))
+
+@pytest.fixture(params=["numpy", "numba"])
+def kernel(request, monkeypatch):
+    if request.param == "numpy":
+        monkeypatch.setattr(camera, "_rgb_to_bgr", None)
+    elif camera._rgb_to_bgr is None:
+        pytest.skip("numba is not installed")
+    return request.param
+
+def test_layouts_cover_every_format():
+    assert set(LAYOUTS) == set(camera.BGR_CHANNELS)
+
+@pytest.mark.parametrize("pixel_format", sorted(LAYOUTS))
+def test_view_and_copy_match_reference(kernel, pixel_format):
+    # An odd width catches kernels that assume an even number of pixels
+    rng = np.random.default_rng(0)
+    bgr = rng.integers(0, 256, (6, 7, 3), dtype=np.uint8)
+    frame = pack(bgr, LAYOUTS[pixel_format])
+
+    converter = camera.BgrConverter(pixel_format, frame)
+    np.testing.assert_array_equal(converter.view(frame), bgr)
+
+    copied = converter.copy(frame)
+    np.testing.assert_array_equal(copied, bgr)
+    assert not np.shares_memory(copied, frame)
@@ -0,0 +1,49 @@
+"""Caching of the dependency report against the dpkg status file."""
+
+import os
+
+import pytest
+
+import camera
+
+@pytest.fixture
+def checks(tmp_path, monkeypatch):
+    """Point the cache at tmp_path and count the runs of the slow checks."""
+    status = tmp_path / "status"
+    status.write_text("Package: python3-picamera2\n")
+    monkeypatch.setattr(camera, "DPKG_STATUS", str(status))
+    monkeypatch.setattr(camera, "DIAGNOSTICS_CACHE", str(tmp_path / "cache" / "diag.json"))
+    runs = []
+
+    def run_dependency_checks():
+        runs.append(None)
+        return [f"report {len(runs)}"]
+
+    monkeypatch.setattr(camera, "run_dependency_checks", run_dependency_checks)
+    return status, runs
+
+def test_report_is_reused_while_packages_are_unchanged(checks):
+    _, runs = checks
+    assert camera.dependency_report() == ["report 1"]
+    assert camera.dependency_report() == ["report 1"]
+    assert len(runs) == 1
+
+def test_report_is_rerun_when_packages_change(checks):
+    status, runs = checks
+    assert camera.dependency_report() == ["report 1"]
+    mtime = os.stat(status).st_mtime
+    os.utime(status, (mtime + 10, mtime + 10))
+    assert camera.dependency_report() == ["report 2"]
+    assert camera.dependency_report() == ["report 2"]
+    assert len(runs) == 2
+
+@pytest.mark.parametrize("contents", ["{not json", "[]", '{"report": []}'],
+                         ids=["invalid", "list", "incomplete"])
+def test_corrupt_cache_is_replaced(checks, contents):
+    _, runs = checks
+    os.makedirs(os.path.dirname(camera.DIAGNOSTICS_CACHE))
+    with open(camera.DIAGNOSTICS_CACHE, "w") as f:
+        f.write(contents)
+    assert camera.dependency_report() == ["report 1"]
+    assert camera.dependency_report() == ["report 1"]
+    assert len(runs) == 1